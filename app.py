@@ -4,15 +4,21 @@ Displays employee, salary, and department information with interactive visualiza
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from database import (
-    get_all_employees,
+    AppData,
+    fetch_dept_map,
+    fetch_employees,
+    fetch_salaries,
+    fetch_departments,
+    fetch_department_salary_stats,
     get_all_salaries,
-    get_all_departments,
-    get_department_salary_stats,
     get_employee_by_id
 )
 
@@ -39,6 +45,52 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
+@st.cache_data
+def load_all():
+    """Load every dataset used by the dashboard pages in one cached call.
+
+    The four queries are independent, so they run concurrently, each on its
+    own connection. The workers call the uncached fetch_* helpers because
+    they have no ScriptRunContext; caching happens here instead.
+    """
+    dept_map = fetch_dept_map()
+    with ThreadPoolExecutor(4) as executor:
+        employees_future = executor.submit(fetch_employees, dept_map)
+        salaries_future = executor.submit(fetch_salaries, dept_map)
+        departments_future = executor.submit(fetch_departments)
+        dept_stats_future = executor.submit(fetch_department_salary_stats)
+    salaries_df = salaries_future.result()
+    max_tc = salaries_df['total_compensation'].max()
+    return AppData(
+        employees=employees_future.result(),
+        salaries=salaries_df,
+        departments=departments_future.result(),
+        dept_stats=dept_stats_future.result(),
+        max_tc=0 if pd.isna(max_tc) else int(max_tc)
+    )
+
+
+def _df_hash(df):
+    """Return a content hash of df, used as the cache key for figure specs.
+
+    This runs on every rerun, so callers pass only the columns the builder reads.
+    """
+    return int(pd.util.hash_pandas_object(df).sum())
+
+
+def _plotly_frame(df):
+    """Return a copy of df with numeric columns as NaN-backed float64 arrays.
+
+    Plotly rejects pd.NA, which the nullable loader dtypes use for the NULL
+    stats of departments without salary rows.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col].dtype):
+            df[col] = df[col].to_numpy(np.float64, na_value=np.nan)
+    return df
+
+
 def check_database_exists():
     """Check if the database file exists."""
     return os.path.exists("employee_database.db")
@@ -64,27 +116,76 @@ def main():
         ["Overview", "Employees", "Salaries", "Departments", "Analytics"]
     )
     
+    # Reload data after the database has been regenerated with init_db.py
+    if st.sidebar.button("🔄 Reload data"):
+        st.cache_data.clear()
+    
+    data = load_all()
+    
     # Page routing
     if page == "Overview":
-        show_overview()
+        show_overview(data)
     elif page == "Employees":
-        show_employees()
+        show_employees(data)
     elif page == "Salaries":
-        show_salaries()
+        show_salaries(data)
     elif page == "Departments":
-        show_departments()
+        show_departments(data)
     elif page == "Analytics":
-        show_analytics()
+        show_analytics(data)
 
 
-def show_overview():
+@st.cache_data
+def _build_department_count_figure(df_hash, _departments_df):
+    """Build the employees-by-department bar chart."""
+    dept_employee_count = _plotly_frame(_departments_df[['department_name', 'employee_count']])
+    fig = px.bar(
+        dept_employee_count,
+        x='department_name',
+        y='employee_count',
+        labels={'department_name': 'Department', 'employee_count': 'Number of Employees'},
+        color='employee_count',
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(showlegend=False)
+    return fig.to_json()
+
+
+@st.cache_data
+def _build_salary_histogram_figure(df_hash, _salaries_df):
+    """Build the total compensation histogram from server-side bin counts."""
+    tc = _salaries_df['total_compensation'].to_numpy(np.float32, na_value=np.nan)
+    tc = tc[~np.isnan(tc)]
+    lo, hi = (float(tc.min()), float(tc.max())) if tc.size else (0.0, 1.0)
+    if lo == hi:
+        # Pad a degenerate range like np.histogram does so the bars keep a width
+        lo, hi = lo - 0.5, hi + 0.5
+    edges = np.linspace(lo, hi, 11)
+    buckets = np.digitize(tc, edges[1:-1]).astype(np.int8)
+    counts = np.bincount(buckets, minlength=10)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color='#1f77b4'
+    ))
+    fig.update_layout(
+        showlegend=False,
+        bargap=0,
+        xaxis_title="Total Compensation ($)",
+        yaxis_title="count"
+    )
+    return fig.to_json()
+
+
+def show_overview(data):
     """Display overview dashboard with key metrics."""
     st.header("📊 Overview")
     
     # Get data
-    employees_df = get_all_employees()
-    salaries_df = get_all_salaries()
-    departments_df = get_all_departments()
+    employees_df = data.employees
+    salaries_df = data.salaries
+    departments_df = data.departments
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -111,64 +212,90 @@ def show_overview():
     with col1:
         st.subheader("Employees by Department")
         dept_employee_count = departments_df[['department_name', 'employee_count']]
-        fig = px.bar(
-            dept_employee_count,
-            x='department_name',
-            y='employee_count',
-            labels={'department_name': 'Department', 'employee_count': 'Number of Employees'},
-            color='employee_count',
-            color_continuous_scale='Blues'
-        )
-        fig.update_layout(showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        spec = _build_department_count_figure(_df_hash(dept_employee_count), dept_employee_count)
+        st.plotly_chart(json.loads(spec), use_container_width=True)
     
     with col2:
         st.subheader("Salary Distribution")
-        fig = px.histogram(
-            salaries_df,
-            x='total_compensation',
-            nbins=10,
-            labels={'total_compensation': 'Total Compensation ($)'},
-            color_discrete_sequence=['#1f77b4']
-        )
-        fig.update_layout(showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        compensation = salaries_df[['total_compensation']]
+        spec = _build_salary_histogram_figure(_df_hash(compensation), compensation)
+        st.plotly_chart(json.loads(spec), use_container_width=True)
 
 
-def show_employees():
+def show_employees(data):
     """Display employee information."""
     st.header("👤 Employees")
     
     # Get employee data
-    employees_df = get_all_employees()
+    employees_df = data.employees
     
+    _employee_search_panel(employees_df)
+
+
+@st.fragment
+def _employee_search_panel(employees_df):
+    """Search box and employee table, rerun on their own as the user types."""
     # Search functionality
     search_term = st.text_input("🔍 Search employees by name or email:")
     if search_term:
-        mask = (
-            employees_df['first_name'].str.contains(search_term, case=False, na=False) |
-            employees_df['last_name'].str.contains(search_term, case=False, na=False) |
-            employees_df['email'].str.contains(search_term, case=False, na=False)
-        )
+        # _search is lowercased at load time, so a plain substring match suffices
+        mask = employees_df['_search'].str.contains(search_term.lower(), regex=False, na=False)
         employees_df = employees_df[mask]
     
     # Display employee table
     st.dataframe(
         employees_df,
         use_container_width=True,
-        hide_index=True
+        hide_index=True,
+        column_config={'_search': None}
     )
     
     st.info(f"Showing {len(employees_df)} employee(s)")
 
 
-def show_salaries():
+def show_salaries(data):
     """Display salary information."""
     st.header("💰 Salaries")
     
-    # Get salary data
-    salaries_df = get_all_salaries()
-    
+    _salary_filter_panel(data.max_tc)
+
+
+@st.cache_data(ttl=3600, max_entries=32)
+def _build_salary_breakdown_figure(min_comp, max_comp, _salaries_df):
+    """Build the stacked base salary and bonus chart.
+
+    _salaries_df is get_all_salaries(min_comp, max_comp), so the bounds
+    alone identify it and the frame is never hashed.
+    """
+    x = _salaries_df['employee_name'].to_numpy()
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                name='Base Salary',
+                x=x,
+                y=_salaries_df['base_salary'].to_numpy(np.float32, na_value=np.nan),
+                marker_color='lightblue'
+            ),
+            go.Bar(
+                name='Bonus',
+                x=x,
+                y=_salaries_df['bonus'].to_numpy(np.float32, na_value=np.nan),
+                marker_color='darkblue'
+            )
+        ],
+        layout=go.Layout(
+            barmode='stack',
+            xaxis_title="Employee",
+            yaxis_title="Amount ($)",
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+    )
+    return fig.to_json()
+
+
+@st.fragment
+def _salary_filter_panel(max_tc):
+    """Compensation filters, salary table and breakdown chart, rerun on their own."""
     # Filter options
     col1, col2 = st.columns(2)
     
@@ -184,15 +311,12 @@ def show_salaries():
         max_salary = st.number_input(
             "Maximum Total Compensation ($)",
             min_value=0,
-            value=int(salaries_df['total_compensation'].max()),
+            value=max_tc,
             step=1000
         )
     
-    # Apply filters
-    filtered_df = salaries_df[
-        (salaries_df['total_compensation'] >= min_salary) &
-        (salaries_df['total_compensation'] <= max_salary)
-    ]
+    # Apply filters in SQL
+    filtered_df = get_all_salaries(int(min_salary), int(max_salary))
     
     # Display salary table
     st.dataframe(
@@ -205,39 +329,38 @@ def show_salaries():
     
     # Salary breakdown chart
     st.subheader("Salary Breakdown")
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        name='Base Salary',
-        x=filtered_df['employee_name'],
-        y=filtered_df['base_salary'],
-        marker_color='lightblue'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Bonus',
-        x=filtered_df['employee_name'],
-        y=filtered_df['bonus'],
-        marker_color='darkblue'
-    ))
-    
-    fig.update_layout(
-        barmode='stack',
-        xaxis_title="Employee",
-        yaxis_title="Amount ($)",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    spec = _build_salary_breakdown_figure(int(min_salary), int(max_salary), filtered_df)
+    st.plotly_chart(json.loads(spec), use_container_width=True)
+
+
+@st.cache_data
+def _build_avg_compensation_figure(df_hash, _dept_stats_df):
+    """Build the average compensation by department bar chart."""
+    # Departments without salary rows have no average to plot, and a null
+    # marker color fails validation when the cached spec is reloaded
+    fig = px.bar(
+        _plotly_frame(_dept_stats_df).dropna(subset=['avg_total_compensation']),
+        x='department_name',
+        y='avg_total_compensation',
+        labels={
+            'department_name': 'Department',
+            'avg_total_compensation': 'Average Total Compensation ($)'
+        },
+        color='avg_total_compensation',
+        color_continuous_scale='Viridis'
     )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    fig.update_layout(showlegend=False)
+    fig.update_yaxes(tickformat='$,.0f')
+    return fig.to_json()
 
 
-def show_departments():
+def show_departments(data):
     """Display department information."""
     st.header("🏢 Departments")
     
     # Get department data
-    departments_df = get_all_departments()
-    dept_stats_df = get_department_salary_stats()
+    departments_df = data.departments
+    dept_stats_df = data.dept_stats
     
     # Display department table
     st.subheader("Department Overview")
@@ -251,88 +374,103 @@ def show_departments():
     
     # Department salary statistics
     st.subheader("Department Salary Statistics")
+    currency = st.column_config.NumberColumn(format='$%.0f')
     st.dataframe(
         dept_stats_df,
         use_container_width=True,
-        hide_index=True
+        hide_index=True,
+        column_config={
+            'avg_total_compensation': currency,
+            'total_compensation': currency,
+            'min_compensation': currency,
+            'max_compensation': currency
+        }
     )
     
     # Visualization
     st.subheader("Average Compensation by Department")
-    fig = px.bar(
-        dept_stats_df,
-        x='department_name',
-        y='avg_total_compensation',
-        labels={
-            'department_name': 'Department',
-            'avg_total_compensation': 'Average Total Compensation ($)'
-        },
-        color='avg_total_compensation',
-        color_continuous_scale='Viridis'
+    avg_compensation = dept_stats_df[['department_name', 'avg_total_compensation']]
+    spec = _build_avg_compensation_figure(_df_hash(avg_compensation), avg_compensation)
+    st.plotly_chart(json.loads(spec), use_container_width=True)
+
+
+@st.cache_data
+def _build_compensation_comparison_figure(df_hash, _dept_stats_df):
+    """Build the min/average/max compensation by department chart."""
+    x = _dept_stats_df['department_name'].to_numpy()
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                name='Min',
+                x=x,
+                y=_dept_stats_df['min_compensation'].to_numpy(np.float64, na_value=np.nan),
+                marker_color='lightcoral'
+            ),
+            go.Bar(
+                name='Average',
+                x=x,
+                y=_dept_stats_df['avg_total_compensation'].to_numpy(np.float64, na_value=np.nan),
+                marker_color='lightskyblue'
+            ),
+            go.Bar(
+                name='Max',
+                x=x,
+                y=_dept_stats_df['max_compensation'].to_numpy(np.float64, na_value=np.nan),
+                marker_color='lightgreen'
+            )
+        ],
+        layout=go.Layout(
+            barmode='group',
+            xaxis_title="Department",
+            yaxis_title="Compensation ($)",
+            yaxis_tickformat='$,.0f',
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
     )
-    fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig.to_json()
 
 
-def show_analytics():
+@st.cache_data
+def _build_payroll_pie_figure(df_hash, _dept_stats_df):
+    """Build the total payroll by department donut chart."""
+    fig = px.pie(
+        _plotly_frame(_dept_stats_df),
+        values='total_compensation',
+        names='department_name',
+        title='Total Payroll by Department',
+        hole=0.4
+    )
+    return fig.to_json()
+
+
+def show_analytics(data):
     """Display advanced analytics and insights."""
     st.header("📈 Analytics")
     
     # Get data
-    salaries_df = get_all_salaries()
-    dept_stats_df = get_department_salary_stats()
+    salaries_df = data.salaries
+    dept_stats_df = data.dept_stats
     
     # Department comparison
     st.subheader("Department Compensation Comparison")
     
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        name='Min',
-        x=dept_stats_df['department_name'],
-        y=dept_stats_df['min_compensation'],
-        marker_color='lightcoral'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Average',
-        x=dept_stats_df['department_name'],
-        y=dept_stats_df['avg_total_compensation'],
-        marker_color='lightskyblue'
-    ))
-    
-    fig.add_trace(go.Bar(
-        name='Max',
-        x=dept_stats_df['department_name'],
-        y=dept_stats_df['max_compensation'],
-        marker_color='lightgreen'
-    ))
-    
-    fig.update_layout(
-        barmode='group',
-        xaxis_title="Department",
-        yaxis_title="Compensation ($)",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    comparison = dept_stats_df[
+        ['department_name', 'min_compensation', 'avg_total_compensation', 'max_compensation']
+    ]
+    spec = _build_compensation_comparison_figure(_df_hash(comparison), comparison)
+    st.plotly_chart(json.loads(spec), use_container_width=True)
     
     # Pie chart for total compensation by department
     st.subheader("Total Compensation Distribution by Department")
     
-    fig = px.pie(
-        dept_stats_df,
-        values='total_compensation',
-        names='department_name',
-        title='Total Payroll by Department',
-        hole=0.4
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    payroll = dept_stats_df[['department_name', 'total_compensation']]
+    spec = _build_payroll_pie_figure(_df_hash(payroll), payroll)
+    st.plotly_chart(json.loads(spec), use_container_width=True)
     
     # Top earners
     st.subheader("Top 5 Earners")
-    top_earners = salaries_df.nlargest(5, 'total_compensation')[
+    # get_all_salaries already orders by total_compensation DESC
+    top_earners = salaries_df.head(5)[
         ['employee_name', 'department_name', 'base_salary', 'bonus', 'total_compensation']
     ]
     st.dataframe(
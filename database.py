@@ -2,104 +2,218 @@
 Database connection and query functions for Employee Management System.
 """
 
+import os
 import sqlite3
+from collections import namedtuple
 import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+try:
+    import connectorx as cx
+except ImportError:
+    cx = None
 
 DB_PATH = "employee_database.db"
 
+# Bundle of the DataFrames shared by all dashboard pages. Defined here rather
+# than in app.py so st.cache_data can pickle it.
+AppData = namedtuple(
+    "AppData", ["employees", "salaries", "departments", "dept_stats", "max_tc"]
+)
+
+# 32-bit widths are plenty for ids, counts and per-row salary figures.
+# Aggregates (department payroll sums, averages) keep full precision.
+DOWNCAST_DTYPES = {
+    'employee_id': 'int32[pyarrow]',
+    'department_id': 'int32[pyarrow]',
+    'employee_count': 'int32[pyarrow]',
+    'base_salary': 'float32[pyarrow]',
+    'bonus': 'float32[pyarrow]',
+    'total_compensation': 'float32[pyarrow]'
+}
+
+EMPLOYEES_QUERY = """
+    SELECT 
+        e.employee_id,
+        e.first_name,
+        e.last_name,
+        e.email,
+        e.hire_date,
+        e.department_id
+    FROM employee e
+    ORDER BY e.employee_id
+"""
+
+SALARIES_QUERY = """
+    SELECT 
+        e.employee_id,
+        e.first_name || ' ' || e.last_name AS employee_name,
+        s.base_salary,
+        s.bonus,
+        s.total_compensation,
+        s.effective_date,
+        e.department_id
+    FROM salary s
+    JOIN employee e ON s.employee_id = e.employee_id
+    {where}
+    ORDER BY total_compensation DESC
+"""
+
+DEPARTMENTS_QUERY = """
+    SELECT 
+        d.department_id,
+        d.department_name,
+        d.location,
+        COUNT(e.employee_id) AS employee_count
+    FROM department d
+    LEFT JOIN employee e ON d.department_id = e.department_id
+    GROUP BY d.department_id, d.department_name, d.location
+    ORDER BY employee_count DESC
+"""
+
+
+def _downcast(df, keep=()):
+    """Narrow the numeric columns present in df, except those in keep, to 32-bit dtypes."""
+    return df.astype({
+        col: dtype for col, dtype in DOWNCAST_DTYPES.items()
+        if col in df.columns and col not in keep
+    })
+
+
+def _read_frame(query, params=(), keep=()):
+    """Run query and return the downcast, pyarrow-backed result DataFrame.
+
+    Uses connectorx when it is installed, which builds Arrow columns directly
+    instead of boxing every cell. connectorx has no bind parameters, so
+    parameterized queries (and installs without connectorx) open a sqlite3
+    connection instead. Columns named in keep are not downcast.
+    """
+    if cx is not None and not params:
+        try:
+            table = cx.read_sql(f"sqlite://{os.path.abspath(DB_PATH)}", query, return_type="arrow")
+            return _downcast(table.to_pandas(types_mapper=pd.ArrowDtype), keep)
+        except RuntimeError:
+            # connectorx cannot type a column that is NULL in every row,
+            # e.g. the salary aggregates when the salary table is empty
+            pass
+    conn = get_connection()
+    df = pd.read_sql_query(query, conn, params=params, dtype_backend='pyarrow')
+    conn.close()
+    return _downcast(df, keep)
+
 
 def get_connection():
     """Create and return a database connection."""
     return sqlite3.connect(DB_PATH)
 
 
-def get_all_employees():
+# The fetch_* helpers below are uncached and never touch the Streamlit
+# runtime, so load_all() can run them on worker threads. The get_* loaders
+# are the cached entry points for code running on the script thread.
+
+def fetch_dept_map():
+    """Get department names and locations keyed by department_id."""
+    df = _read_frame("SELECT department_id, department_name, location FROM department")
+    ids = df['department_id'].tolist()
+    return dict(zip(ids, df['department_name'])), dict(zip(ids, df['location']))
+
+
+def _attach_departments(df, dept_map, include_location=False):
+    """Replace df's department_id column with the department name (and location)."""
+    names, locations = dept_map
+    string_dtype = pd.ArrowDtype(pa.string())
+    pos = df.columns.get_loc('department_id')
+    df.insert(pos, 'department_name', df['department_id'].map(names).astype(string_dtype))
+    if include_location:
+        df.insert(pos + 1, 'location', df['department_id'].map(locations).astype(string_dtype))
+    return df.drop(columns='department_id')
+
+
+def fetch_employees(dept_map):
     """Get all employees with their department information."""
-    conn = get_connection()
-    query = """
-        SELECT 
-            e.employee_id,
-            e.first_name,
-            e.last_name,
-            e.email,
-            e.hire_date,
-            d.department_name,
-            d.location
-        FROM employee e
-        LEFT JOIN department d ON e.department_id = d.department_id
-        ORDER BY e.employee_id
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    df = _read_frame(EMPLOYEES_QUERY)
+    df = _attach_departments(df, dept_map, include_location=True)
+    # Lowercase in pandas rather than SQL: SQLite's LOWER() only folds ASCII
+    df['_search'] = (df['first_name'] + ' ' + df['last_name'] + ' ' + df['email']).str.lower()
     return df
 
 
-def get_all_salaries():
-    """Get all salary information with employee details."""
-    conn = get_connection()
-    query = """
-        SELECT 
-            e.employee_id,
-            e.first_name || ' ' || e.last_name AS employee_name,
-            s.base_salary,
-            s.bonus,
-            s.base_salary + s.bonus AS total_compensation,
-            s.effective_date,
-            d.department_name
-        FROM salary s
-        JOIN employee e ON s.employee_id = e.employee_id
-        LEFT JOIN department d ON e.department_id = d.department_id
-        ORDER BY total_compensation DESC
+def fetch_salaries(dept_map, min_comp=None, max_comp=None):
+    """Get salary information with employee details.
+
+    When both min_comp and max_comp are given, only rows whose total
+    compensation falls within that range are returned.
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    where = ""
+    params = ()
+    if min_comp is not None and max_comp is not None:
+        where = "WHERE s.total_compensation BETWEEN ? AND ?"
+        params = (min_comp, max_comp)
+    df = _read_frame(SALARIES_QUERY.format(where=where), params)
+    return _attach_departments(df, dept_map)
 
 
-def get_all_departments():
+def fetch_departments():
     """Get all departments with employee count."""
-    conn = get_connection()
-    query = """
-        SELECT 
-            d.department_id,
-            d.department_name,
-            d.location,
-            COUNT(e.employee_id) AS employee_count
-        FROM department d
-        LEFT JOIN employee e ON d.department_id = e.department_id
-        GROUP BY d.department_id, d.department_name, d.location
-        ORDER BY employee_count DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return _read_frame(DEPARTMENTS_QUERY)
 
 
-def get_department_salary_stats():
+def fetch_department_salary_stats():
     """Get salary statistics by department."""
-    conn = get_connection()
     query = """
         SELECT 
             d.department_name,
             COUNT(e.employee_id) AS employee_count,
-            ROUND(AVG(s.base_salary + s.bonus), 2) AS avg_total_compensation,
-            ROUND(SUM(s.base_salary + s.bonus), 2) AS total_compensation,
-            ROUND(MIN(s.base_salary + s.bonus), 2) AS min_compensation,
-            ROUND(MAX(s.base_salary + s.bonus), 2) AS max_compensation
+            AVG(s.total_compensation) AS avg_total_compensation,
+            SUM(s.total_compensation) AS total_compensation,
+            MIN(s.total_compensation) AS min_compensation,
+            MAX(s.total_compensation) AS max_compensation
         FROM department d
         LEFT JOIN employee e ON d.department_id = e.department_id
         LEFT JOIN salary s ON e.employee_id = s.employee_id
         GROUP BY d.department_name
         ORDER BY avg_total_compensation DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    # total_compensation here is a SUM, too large for float32 to hold exactly
+    return _read_frame(query, keep=('total_compensation',))
+
+
+@st.cache_data(ttl=3600)
+def _dept_map():
+    """Cached fetch_dept_map()."""
+    return fetch_dept_map()
+
+
+@st.cache_data(ttl=3600)
+def get_all_employees():
+    """Get all employees with their department information."""
+    return fetch_employees(_dept_map())
+
+
+# Keyed on every (min, max) pair typed into the salary filters, so bound
+# the number of filtered frames kept in memory
+@st.cache_data(ttl=3600, max_entries=32)
+def get_all_salaries(min_comp=None, max_comp=None):
+    """Get salary information with employee details (see fetch_salaries)."""
+    return fetch_salaries(_dept_map(), min_comp, max_comp)
+
+
+@st.cache_data(ttl=3600)
+def get_all_departments():
+    """Get all departments with employee count."""
+    return fetch_departments()
+
+
+@st.cache_data(ttl=3600)
+def get_department_salary_stats():
+    """Get salary statistics by department."""
+    return fetch_department_salary_stats()
 
 
+@st.cache_data(ttl=3600)
 def get_employee_by_id(employee_id):
     """Get detailed information for a specific employee."""
-    conn = get_connection()
     query = """
         SELECT 
             e.employee_id,
@@ -111,12 +225,10 @@ def get_employee_by_id(employee_id):
             d.location,
             s.base_salary,
             s.bonus,
-            s.base_salary + s.bonus AS total_compensation
+            s.total_compensation
         FROM employee e
         LEFT JOIN department d ON e.department_id = d.department_id
         LEFT JOIN salary s ON e.employee_id = s.employee_id
         WHERE e.employee_id = ?
     """
-    df = pd.read_sql_query(query, conn, params=(employee_id,))
-    conn.close()
-    return df
+    return _read_frame(query, (employee_id,))